@@ -0,0 +1,603 @@
+/*
+ * Noyaux natifs optionnels pour collision_birthday_attack.py
+ *
+ * Compilés en bibliothèque partagée (voir Makefile) et chargés via ctypes.
+ * Le script Python retombe automatiquement sur sa version pure Python si la
+ * bibliothèque n'est pas compilée ou si le CPU ne supporte pas les
+ * extensions nécessaires.
+ *
+ * radix_sort_u64_by_key : tri radix LSD en temps linéaire des paires
+ * (préfixe, x), à la place du tri par comparaison de numpy.
+ *
+ * kway_merge_find_candidates : fusion k-voies par tas min de tranches déjà
+ * triées, qui émet directement les paires candidates à préfixe égal.
+ *
+ * hashtable_find_candidates : détection des préfixes en double par table de
+ * hachage à adressage ouvert, sans aucun tri (--detector hashtable).
+ *
+ * sha256_batch_prefix : SHA-256 en lot via libcrypto (OpenSSL), avec un
+ * contexte modèle initialisé une seule fois et recopié par message. Évite
+ * l'aller-retour Python/hashlib et l'initialisation du contexte à chaque
+ * appel, sur n'importe quel CPU.
+ *
+ * sha256ni_batch_prefix : SHA-256 via les instructions SHA-NI d'Intel pour
+ * des messages de 8 octets. Chaque message tient dans un seul bloc de 64
+ * octets dont seuls les 8 premiers octets varient : le padding est constant
+ * et le schedule initial est construit directement en registres, sans
+ * buffer intermédiaire. ~40 cycles par message, loin devant un appel
+ * hashlib par échantillon.
+ */
+
+#include <stdint.h>
+#include <stddef.h>
+#include <stdlib.h>
+#include <string.h>
+
+/*
+ * Tri radix LSD de deux tableaux uint64 parallèles, par octets de la clé.
+ *
+ * Les préfixes tiennent sur key_bytes octets (5 pour 10 hex) : key_bytes
+ * passes de comptage sur 256 seaux suffisent, en temps linéaire et en accès
+ * mémoire purement séquentiels, là où un tri par comparaison paie O(n log n)
+ * comparaisons et leurs erreurs de prédiction de branchement. Les passes
+ * dont l'octet est constant sur tout le tableau sont sautées.
+ *
+ * Renvoie 0 si ok, -1 si l'allocation des buffers temporaires échoue
+ * (l'appelant retombe alors sur np.argsort).
+ */
+int
+radix_sort_u64_by_key(uint64_t *keys, uint64_t *vals, size_t n, int key_bytes)
+{
+    uint64_t *tmp_k, *tmp_v;
+    uint64_t *src_k, *src_v, *dst_k, *dst_v;
+    size_t count[256];
+    size_t i;
+    int pass;
+
+    if (n < 2)
+        return 0;
+    if (key_bytes < 1)
+        key_bytes = 1;
+    if (key_bytes > 8)
+        key_bytes = 8;
+
+    tmp_k = malloc(n * sizeof(uint64_t));
+    tmp_v = malloc(n * sizeof(uint64_t));
+    if (tmp_k == NULL || tmp_v == NULL) {
+        free(tmp_k);
+        free(tmp_v);
+        return -1;
+    }
+
+    src_k = keys;  src_v = vals;
+    dst_k = tmp_k; dst_v = tmp_v;
+
+    for (pass = 0; pass < key_bytes; pass++) {
+        const int shift = pass * 8;
+        uint64_t *swap_k, *swap_v;
+        size_t total;
+
+        memset(count, 0, sizeof(count));
+        for (i = 0; i < n; i++)
+            count[(src_k[i] >> shift) & 0xFF]++;
+
+        /* Octet constant sur tout le tableau : la passe ne changerait rien */
+        if (count[(src_k[0] >> shift) & 0xFF] == n)
+            continue;
+
+        total = 0;
+        for (i = 0; i < 256; i++) {
+            const size_t c = count[i];
+            count[i] = total;
+            total += c;
+        }
+
+        for (i = 0; i < n; i++) {
+            const size_t pos = count[(src_k[i] >> shift) & 0xFF]++;
+            dst_k[pos] = src_k[i];
+            dst_v[pos] = src_v[i];
+        }
+
+        swap_k = src_k; src_k = dst_k; dst_k = swap_k;
+        swap_v = src_v; src_v = dst_v; dst_v = swap_v;
+    }
+
+    if (src_k != keys) {
+        memcpy(keys, src_k, n * sizeof(uint64_t));
+        memcpy(vals, src_v, n * sizeof(uint64_t));
+    }
+
+    free(tmp_k);
+    free(tmp_v);
+    return 0;
+}
+
+/*
+ * Fusion k-voies de tranches déjà triées, avec détection des doublons à la
+ * volée : au lieu de matérialiser le tableau fusionné puis de le re-scanner,
+ * on maintient un tas min de k têtes de tranche et on compare chaque élément
+ * émis au précédent. Une passe unique sur les données, zéro allocation
+ * proportionnelle à n — fusion et scan sont fusionnés (kernel fusion).
+ *
+ * Les tranches sont des vues contiguës des tableaux globaux (prefix, x) :
+ * la tranche r couvre [run_offsets[r], run_offsets[r] + run_lengths[r]).
+ * Chaque paire candidate (préfixes adjacents égaux dans l'ordre fusionné)
+ * est écrite dans out_x1/out_x2, au plus out_cap paires.
+ *
+ * Renvoie le nombre de paires écrites, ou (size_t)-1 si l'allocation échoue.
+ */
+size_t
+kway_merge_find_candidates(const uint64_t *prefix, const uint64_t *x,
+                           const size_t *run_offsets,
+                           const size_t *run_lengths, size_t k,
+                           uint64_t *out_x1, uint64_t *out_x2, size_t out_cap)
+{
+    struct node { uint64_t key; size_t run; };
+    struct node *heap;
+    size_t *pos;
+    size_t heap_size = 0;
+    size_t found = 0;
+    uint64_t last_prefix = 0, last_x = 0;
+    int have_last = 0;
+    size_t r, i;
+
+    heap = malloc(k * sizeof(struct node));
+    pos = calloc(k, sizeof(size_t));
+    if (heap == NULL || pos == NULL) {
+        free(heap);
+        free(pos);
+        return (size_t)-1;
+    }
+
+    /* Construit le tas avec la tête de chaque tranche non vide */
+    for (r = 0; r < k; r++) {
+        if (run_lengths[r] == 0)
+            continue;
+        i = heap_size++;
+        heap[i].key = prefix[run_offsets[r]];
+        heap[i].run = r;
+        while (i > 0 && heap[(i - 1) / 2].key > heap[i].key) {
+            struct node tmp = heap[(i - 1) / 2];
+            heap[(i - 1) / 2] = heap[i];
+            heap[i] = tmp;
+            i = (i - 1) / 2;
+        }
+    }
+
+    while (heap_size > 0 && found < out_cap) {
+        const size_t run = heap[0].run;
+        const uint64_t key = heap[0].key;
+        const uint64_t cur_x = x[run_offsets[run] + pos[run]];
+
+        if (have_last && key == last_prefix) {
+            out_x1[found] = last_x;
+            out_x2[found] = cur_x;
+            found++;
+        }
+        last_prefix = key;
+        last_x = cur_x;
+        have_last = 1;
+
+        /* Remplace la racine par l'élément suivant de la même tranche,
+         * ou par le dernier nœud du tas si la tranche est épuisée */
+        pos[run]++;
+        if (pos[run] < run_lengths[run]) {
+            heap[0].key = prefix[run_offsets[run] + pos[run]];
+        } else {
+            heap[0] = heap[--heap_size];
+        }
+
+        /* Re-descend la racine à sa place */
+        i = 0;
+        for (;;) {
+            size_t smallest = i;
+            const size_t left = 2 * i + 1;
+            const size_t right = 2 * i + 2;
+            struct node tmp;
+
+            if (left < heap_size && heap[left].key < heap[smallest].key)
+                smallest = left;
+            if (right < heap_size && heap[right].key < heap[smallest].key)
+                smallest = right;
+            if (smallest == i)
+                break;
+            tmp = heap[i];
+            heap[i] = heap[smallest];
+            heap[smallest] = tmp;
+            i = smallest;
+        }
+    }
+
+    free(heap);
+    free(pos);
+    return found;
+}
+
+/*
+ * Détection de doublons par table de hachage à adressage ouvert, sans tri.
+ *
+ * Une attaque d'anniversaire n'a pas besoin de l'ordre total : il suffit de
+ * savoir si un préfixe a déjà été vu. La table fait ~2n emplacements
+ * (puissance de deux), l'indice est obtenu par multiplication par la
+ * constante du nombre d'or puis décalage (Fibonacci hashing), les conflits
+ * sont résolus par sondage linéaire — cache-friendly. Chaque (prefix, x)
+ * est inséré ; si l'emplacement contient déjà le même préfixe, la paire est
+ * émise dans out_x1/out_x2. Une passe O(n) attendue, contre O(n log n) pour
+ * trier, au prix de ~17 octets par emplacement.
+ *
+ * Renvoie le nombre de paires écrites (au plus out_cap), ou (size_t)-1 si
+ * l'allocation échoue (l'appelant retombe alors sur le tri).
+ */
+size_t
+hashtable_find_candidates(const uint64_t *prefix, const uint64_t *x, size_t n,
+                          uint64_t *out_x1, uint64_t *out_x2, size_t out_cap)
+{
+    const uint64_t golden = 0x9E3779B97F4A7C15ULL;
+    uint64_t *tab_prefix, *tab_x;
+    uint8_t *tab_used;
+    size_t cap = 16;
+    int cap_log2 = 4;
+    size_t found = 0;
+    size_t i;
+
+    while (cap < 2 * n) {
+        cap <<= 1;
+        cap_log2++;
+    }
+
+    tab_prefix = malloc(cap * sizeof(uint64_t));
+    tab_x = malloc(cap * sizeof(uint64_t));
+    tab_used = calloc(cap, sizeof(uint8_t));
+    if (tab_prefix == NULL || tab_x == NULL || tab_used == NULL) {
+        free(tab_prefix);
+        free(tab_x);
+        free(tab_used);
+        return (size_t)-1;
+    }
+
+    for (i = 0; i < n && found < out_cap; i++) {
+        const uint64_t key = prefix[i];
+        size_t slot = (size_t)((key * golden) >> (64 - cap_log2));
+
+        for (;;) {
+            if (!tab_used[slot]) {
+                tab_used[slot] = 1;
+                tab_prefix[slot] = key;
+                tab_x[slot] = x[i];
+                break;
+            }
+            if (tab_prefix[slot] == key) {
+                out_x1[found] = tab_x[slot];
+                out_x2[found] = x[i];
+                found++;
+                break;
+            }
+            slot = (slot + 1) & (cap - 1);
+        }
+    }
+
+    free(tab_prefix);
+    free(tab_x);
+    free(tab_used);
+    return found;
+}
+
+#if defined(__has_include)
+#if __has_include(<openssl/sha.h>)
+#define CKERNELS_HAVE_OPENSSL 1
+#endif
+#endif
+
+#ifdef CKERNELS_HAVE_OPENSSL
+/* L'API SHA256_* est dépréciée depuis OpenSSL 3 au profit d'EVP, mais EVP ne
+ * permet pas de recopier un contexte par simple memcpy : c'est précisément
+ * ce clonage à coût nul qui rend la boucle rapide */
+#define OPENSSL_SUPPRESS_DEPRECATED
+#include <openssl/sha.h>
+
+int
+ckernels_has_sha256_batch(void)
+{
+    return 1;
+}
+
+/*
+ * Hache chaque x de xs[0..n) (encodé sur 8 octets gros-boutiste) avec le
+ * SHA-256 d'OpenSSL et écrit les 64 premiers bits du digest décalés de
+ * `shift` bits à droite, comme sha256ni_batch_prefix.
+ *
+ * Le contexte est initialisé une seule fois puis recopié par affectation de
+ * structure pour chaque message : zéro allocation dans la boucle, et le
+ * compilateur peut garder le contexte chaud en cache. Sert de chemin rapide
+ * sur les CPU sans SHA-NI (le code assembleur de libcrypto reste bien plus
+ * rapide qu'un appel hashlib par échantillon).
+ */
+void
+sha256_batch_prefix(const uint64_t *xs, size_t n, int shift,
+                    uint64_t *prefix_out)
+{
+    SHA256_CTX template_ctx;
+    size_t i;
+
+    SHA256_Init(&template_ctx);
+
+    for (i = 0; i < n; i++) {
+        SHA256_CTX ctx = template_ctx;
+        unsigned char msg[8];
+        unsigned char digest[32];
+        const uint64_t x = xs[i];
+        uint64_t head;
+        int b;
+
+        for (b = 0; b < 8; b++)
+            msg[b] = (unsigned char)(x >> (56 - 8 * b));
+
+        SHA256_Update(&ctx, msg, 8);
+        SHA256_Final(digest, &ctx);
+
+        head = 0;
+        for (b = 0; b < 8; b++)
+            head = (head << 8) | digest[b];
+        prefix_out[i] = head >> shift;
+    }
+}
+
+#else /* compilé sans les en-têtes OpenSSL */
+
+int
+ckernels_has_sha256_batch(void)
+{
+    return 0;
+}
+
+void
+sha256_batch_prefix(const uint64_t *xs, size_t n, int shift,
+                    uint64_t *prefix_out)
+{
+    (void)xs; (void)n; (void)shift; (void)prefix_out;
+}
+
+#endif
+
+#if defined(__x86_64__) || defined(_M_X64)
+#include <immintrin.h>
+
+/* Le CPU courant sait-il exécuter les instructions SHA-NI ? */
+int
+ckernels_has_shani(void)
+{
+    return __builtin_cpu_supports("sha") && __builtin_cpu_supports("sse4.1");
+}
+
+/*
+ * Calcule, pour chaque x de xs[0..n), les 64 premiers bits du digest
+ * SHA-256 du message x encodé sur 8 octets gros-boutiste, décalés de
+ * `shift` bits à droite (shift = 64 - prefix_bits).
+ *
+ * Un seul bloc SHA-256 par message :
+ *   bloc = [ x (8 octets) | 0x80 | zéros | longueur = 64 bits ]
+ * soit, en mots de 32 bits :
+ *   W0 = x >> 32, W1 = x, W2 = 0x80000000, W3..W14 = 0, W15 = 64
+ */
+__attribute__((target("sha,sse4.1")))
+void
+sha256ni_batch_prefix(const uint64_t *xs, size_t n, int shift,
+                      uint64_t *prefix_out)
+{
+    /* État initial SHA-256 réarrangé une fois en registres ABEF / CDGH */
+    const __m128i abcd = _mm_set_epi32(0xA54FF53A, 0x3C6EF372,
+                                       0xBB67AE85, 0x6A09E667);
+    const __m128i efgh = _mm_set_epi32(0x5BE0CD19, 0x1F83D9AB,
+                                       0x9B05688C, 0x510E527F);
+    __m128i tmp = _mm_shuffle_epi32(abcd, 0xB1);       /* CDAB */
+    __m128i st1 = _mm_shuffle_epi32(efgh, 0x1B);       /* EFGH */
+    const __m128i init0 = _mm_alignr_epi8(tmp, st1, 8);       /* ABEF */
+    const __m128i init1 = _mm_blend_epi16(st1, tmp, 0xF0);    /* CDGH */
+
+    /* W2 = 0x80 de padding, W15 = longueur du message (64 bits) */
+    const __m128i msg1_c = _mm_setzero_si128();
+    const __m128i msg2_c = _mm_setzero_si128();
+    const __m128i msg3_c = _mm_set_epi32(64, 0, 0, 0);
+
+    for (size_t i = 0; i < n; i++) {
+        const uint64_t x = xs[i];
+        __m128i state0 = init0;
+        __m128i state1 = init1;
+        __m128i msg, msg0, msg1, msg2, msg3;
+
+        msg0 = _mm_set_epi32(0, (int)0x80000000,
+                             (uint32_t)x, (uint32_t)(x >> 32));
+        msg1 = msg1_c;
+        msg2 = msg2_c;
+        msg3 = msg3_c;
+
+        /* Rondes 0-3 */
+        msg = _mm_add_epi32(msg0,
+            _mm_set_epi64x(0xE9B5DBA5B5C0FBCFULL, 0x71374491428A2F98ULL));
+        state1 = _mm_sha256rnds2_epu32(state1, state0, msg);
+        msg = _mm_shuffle_epi32(msg, 0x0E);
+        state0 = _mm_sha256rnds2_epu32(state0, state1, msg);
+
+        /* Rondes 4-7 */
+        msg = _mm_add_epi32(msg1,
+            _mm_set_epi64x(0xAB1C5ED5923F82A4ULL, 0x59F111F13956C25BULL));
+        state1 = _mm_sha256rnds2_epu32(state1, state0, msg);
+        msg = _mm_shuffle_epi32(msg, 0x0E);
+        state0 = _mm_sha256rnds2_epu32(state0, state1, msg);
+        msg0 = _mm_sha256msg1_epu32(msg0, msg1);
+
+        /* Rondes 8-11 */
+        msg = _mm_add_epi32(msg2,
+            _mm_set_epi64x(0x550C7DC3243185BEULL, 0x12835B01D807AA98ULL));
+        state1 = _mm_sha256rnds2_epu32(state1, state0, msg);
+        msg = _mm_shuffle_epi32(msg, 0x0E);
+        state0 = _mm_sha256rnds2_epu32(state0, state1, msg);
+        msg1 = _mm_sha256msg1_epu32(msg1, msg2);
+
+        /* Rondes 12-15 */
+        msg = _mm_add_epi32(msg3,
+            _mm_set_epi64x(0xC19BF1749BDC06A7ULL, 0x80DEB1FE72BE5D74ULL));
+        state1 = _mm_sha256rnds2_epu32(state1, state0, msg);
+        tmp = _mm_alignr_epi8(msg3, msg2, 4);
+        msg0 = _mm_add_epi32(msg0, tmp);
+        msg0 = _mm_sha256msg2_epu32(msg0, msg3);
+        msg = _mm_shuffle_epi32(msg, 0x0E);
+        state0 = _mm_sha256rnds2_epu32(state0, state1, msg);
+        msg2 = _mm_sha256msg1_epu32(msg2, msg3);
+
+        /* Rondes 16-19 */
+        msg = _mm_add_epi32(msg0,
+            _mm_set_epi64x(0x240CA1CC0FC19DC6ULL, 0xEFBE4786E49B69C1ULL));
+        state1 = _mm_sha256rnds2_epu32(state1, state0, msg);
+        tmp = _mm_alignr_epi8(msg0, msg3, 4);
+        msg1 = _mm_add_epi32(msg1, tmp);
+        msg1 = _mm_sha256msg2_epu32(msg1, msg0);
+        msg = _mm_shuffle_epi32(msg, 0x0E);
+        state0 = _mm_sha256rnds2_epu32(state0, state1, msg);
+        msg3 = _mm_sha256msg1_epu32(msg3, msg0);
+
+        /* Rondes 20-23 */
+        msg = _mm_add_epi32(msg1,
+            _mm_set_epi64x(0x76F988DA5CB0A9DCULL, 0x4A7484AA2DE92C6FULL));
+        state1 = _mm_sha256rnds2_epu32(state1, state0, msg);
+        tmp = _mm_alignr_epi8(msg1, msg0, 4);
+        msg2 = _mm_add_epi32(msg2, tmp);
+        msg2 = _mm_sha256msg2_epu32(msg2, msg1);
+        msg = _mm_shuffle_epi32(msg, 0x0E);
+        state0 = _mm_sha256rnds2_epu32(state0, state1, msg);
+        msg0 = _mm_sha256msg1_epu32(msg0, msg1);
+
+        /* Rondes 24-27 */
+        msg = _mm_add_epi32(msg2,
+            _mm_set_epi64x(0xBF597FC7B00327C8ULL, 0xA831C66D983E5152ULL));
+        state1 = _mm_sha256rnds2_epu32(state1, state0, msg);
+        tmp = _mm_alignr_epi8(msg2, msg1, 4);
+        msg3 = _mm_add_epi32(msg3, tmp);
+        msg3 = _mm_sha256msg2_epu32(msg3, msg2);
+        msg = _mm_shuffle_epi32(msg, 0x0E);
+        state0 = _mm_sha256rnds2_epu32(state0, state1, msg);
+        msg1 = _mm_sha256msg1_epu32(msg1, msg2);
+
+        /* Rondes 28-31 */
+        msg = _mm_add_epi32(msg3,
+            _mm_set_epi64x(0x1429296706CA6351ULL, 0xD5A79147C6E00BF3ULL));
+        state1 = _mm_sha256rnds2_epu32(state1, state0, msg);
+        tmp = _mm_alignr_epi8(msg3, msg2, 4);
+        msg0 = _mm_add_epi32(msg0, tmp);
+        msg0 = _mm_sha256msg2_epu32(msg0, msg3);
+        msg = _mm_shuffle_epi32(msg, 0x0E);
+        state0 = _mm_sha256rnds2_epu32(state0, state1, msg);
+        msg2 = _mm_sha256msg1_epu32(msg2, msg3);
+
+        /* Rondes 32-35 */
+        msg = _mm_add_epi32(msg0,
+            _mm_set_epi64x(0x53380D134D2C6DFCULL, 0x2E1B213827B70A85ULL));
+        state1 = _mm_sha256rnds2_epu32(state1, state0, msg);
+        tmp = _mm_alignr_epi8(msg0, msg3, 4);
+        msg1 = _mm_add_epi32(msg1, tmp);
+        msg1 = _mm_sha256msg2_epu32(msg1, msg0);
+        msg = _mm_shuffle_epi32(msg, 0x0E);
+        state0 = _mm_sha256rnds2_epu32(state0, state1, msg);
+        msg3 = _mm_sha256msg1_epu32(msg3, msg0);
+
+        /* Rondes 36-39 */
+        msg = _mm_add_epi32(msg1,
+            _mm_set_epi64x(0x92722C8581C2C92EULL, 0x766A0ABB650A7354ULL));
+        state1 = _mm_sha256rnds2_epu32(state1, state0, msg);
+        tmp = _mm_alignr_epi8(msg1, msg0, 4);
+        msg2 = _mm_add_epi32(msg2, tmp);
+        msg2 = _mm_sha256msg2_epu32(msg2, msg1);
+        msg = _mm_shuffle_epi32(msg, 0x0E);
+        state0 = _mm_sha256rnds2_epu32(state0, state1, msg);
+        msg0 = _mm_sha256msg1_epu32(msg0, msg1);
+
+        /* Rondes 40-43 */
+        msg = _mm_add_epi32(msg2,
+            _mm_set_epi64x(0xC76C51A3C24B8B70ULL, 0xA81A664BA2BFE8A1ULL));
+        state1 = _mm_sha256rnds2_epu32(state1, state0, msg);
+        tmp = _mm_alignr_epi8(msg2, msg1, 4);
+        msg3 = _mm_add_epi32(msg3, tmp);
+        msg3 = _mm_sha256msg2_epu32(msg3, msg2);
+        msg = _mm_shuffle_epi32(msg, 0x0E);
+        state0 = _mm_sha256rnds2_epu32(state0, state1, msg);
+        msg1 = _mm_sha256msg1_epu32(msg1, msg2);
+
+        /* Rondes 44-47 */
+        msg = _mm_add_epi32(msg3,
+            _mm_set_epi64x(0x106AA070F40E3585ULL, 0xD6990624D192E819ULL));
+        state1 = _mm_sha256rnds2_epu32(state1, state0, msg);
+        tmp = _mm_alignr_epi8(msg3, msg2, 4);
+        msg0 = _mm_add_epi32(msg0, tmp);
+        msg0 = _mm_sha256msg2_epu32(msg0, msg3);
+        msg = _mm_shuffle_epi32(msg, 0x0E);
+        state0 = _mm_sha256rnds2_epu32(state0, state1, msg);
+        msg2 = _mm_sha256msg1_epu32(msg2, msg3);
+
+        /* Rondes 48-51 */
+        msg = _mm_add_epi32(msg0,
+            _mm_set_epi64x(0x34B0BCB52748774CULL, 0x1E376C0819A4C116ULL));
+        state1 = _mm_sha256rnds2_epu32(state1, state0, msg);
+        tmp = _mm_alignr_epi8(msg0, msg3, 4);
+        msg1 = _mm_add_epi32(msg1, tmp);
+        msg1 = _mm_sha256msg2_epu32(msg1, msg0);
+        msg = _mm_shuffle_epi32(msg, 0x0E);
+        state0 = _mm_sha256rnds2_epu32(state0, state1, msg);
+        msg3 = _mm_sha256msg1_epu32(msg3, msg0);
+
+        /* Rondes 52-55 */
+        msg = _mm_add_epi32(msg1,
+            _mm_set_epi64x(0x682E6FF35B9CCA4FULL, 0x4ED8AA4A391C0CB3ULL));
+        state1 = _mm_sha256rnds2_epu32(state1, state0, msg);
+        tmp = _mm_alignr_epi8(msg1, msg0, 4);
+        msg2 = _mm_add_epi32(msg2, tmp);
+        msg2 = _mm_sha256msg2_epu32(msg2, msg1);
+        msg = _mm_shuffle_epi32(msg, 0x0E);
+        state0 = _mm_sha256rnds2_epu32(state0, state1, msg);
+
+        /* Rondes 56-59 */
+        msg = _mm_add_epi32(msg2,
+            _mm_set_epi64x(0x8CC7020884C87814ULL, 0x78A5636F748F82EEULL));
+        state1 = _mm_sha256rnds2_epu32(state1, state0, msg);
+        tmp = _mm_alignr_epi8(msg2, msg1, 4);
+        msg3 = _mm_add_epi32(msg3, tmp);
+        msg3 = _mm_sha256msg2_epu32(msg3, msg2);
+        msg = _mm_shuffle_epi32(msg, 0x0E);
+        state0 = _mm_sha256rnds2_epu32(state0, state1, msg);
+
+        /* Rondes 60-63 */
+        msg = _mm_add_epi32(msg3,
+            _mm_set_epi64x(0xC67178F2BEF9A3F7ULL, 0xA4506CEB90BEFFFAULL));
+        state1 = _mm_sha256rnds2_epu32(state1, state0, msg);
+        msg = _mm_shuffle_epi32(msg, 0x0E);
+        state0 = _mm_sha256rnds2_epu32(state0, state1, msg);
+
+        /* Addition finale avec l'état initial */
+        state0 = _mm_add_epi32(state0, init0);
+        state1 = _mm_add_epi32(state1, init1);
+
+        /* state0 = ABEF : A en voie 3, B en voie 2 */
+        {
+            const uint32_t a = (uint32_t)_mm_extract_epi32(state0, 3);
+            const uint32_t b = (uint32_t)_mm_extract_epi32(state0, 2);
+            const uint64_t head = ((uint64_t)a << 32) | b;
+            prefix_out[i] = head >> shift;
+        }
+    }
+}
+
+#else /* architecture non x86-64 : pas de SHA-NI */
+
+int
+ckernels_has_shani(void)
+{
+    return 0;
+}
+
+void
+sha256ni_batch_prefix(const uint64_t *xs, size_t n, int shift,
+                      uint64_t *prefix_out)
+{
+    (void)xs; (void)n; (void)shift; (void)prefix_out;
+}
+
+#endif
@@ -1,297 +1,647 @@
-import argparse
-import hashlib
-import os
-import time
-import random
-import multiprocessing as mp
-import heapq
-import signal
-from typing import List
-
-
-# Dossier où seront écrits les résultats
-BASE_DIR = "Collision_Birthday"
-
-# Valeurs par défaut
-DEFAULT_ALGO = "sha256"
-DEFAULT_PREFIX = 10
-DEFAULT_MAX_SAMPLES = 7_000_000  # à adapter selon la RAM disponible
-DEFAULT_WORKERS = os.cpu_count() or 1
-DEFAULT_SORT_CHUNKS = DEFAULT_WORKERS  # même nombre que workers, par défaut
-
-def ensure_dir(path: str) -> None:
-    """
-    Crée le dossier s'il n'existe pas
-    """
-    os.makedirs(path, exist_ok=True)
-
-
-def make_hash_func(algo: str):
-    """
-    Retourne une fonction de hachage correspondant au nom d'algorithme demandé.
-    La fonction retournée prend des bytes en entrée et renvoie le digest (bytes)
-    """
-    if algo == "sha256":
-        def hash_function(data: bytes) -> bytes:
-            return hashlib.sha256(data).digest()
-    elif algo == "sha3_256":
-        def hash_function(data: bytes) -> bytes:
-            return hashlib.sha3_256(data).digest()
-    else:
-        raise ValueError("Algorithme de hachage inconnu : {}".format(algo))
-
-    return hash_function
-
-
-def worker_generate_packed(count: int,prefix_len_hex: int,algo: str,seed: int) -> List[int]:
-    """
-    Fonction exécutée dans un processus worker
-
-    Elle génère `count` valeurs aléatoires x à partir d'une seed, calcule leurs hash, extrait le préfixe demandé, et packe le tout dans un seul entier :
-        packed = (prefix_int << 64) | x
-
-    On renvoie une liste d'entiers "packed"
-    """
-    rng = random.Random(seed)
-    hash_function = make_hash_func(algo)
-
-    prefix_bits = prefix_len_hex * 4
-    needed_bytes = (prefix_bits + 7) // 8
-
-    packed_list: List[int] = []
-
-    for _ in range(count):
-        # Génére un message de 64 bits
-        x = rng.getrandbits(64)
-        data = x.to_bytes(8, "big")
-
-        # Hacher le message
-        digest = hash_function(data)
-
-        # Extraire juste les octets nécessaires au préfixe
-        prefix_bytes = digest[:needed_bytes]
-
-        # Convertir en entier
-        prefix_int = int.from_bytes(prefix_bytes, "big")
-
-        # Supprimer les bits en trop dans le dernier octet
-        extra_bits = needed_bytes * 8 - prefix_bits
-        if extra_bits > 0:
-            prefix_int >>= extra_bits
-
-        # Pack dans un seul entier : préfixe en haut, x en bas
-        packed = (prefix_int << 64) | x
-        packed_list.append(packed)
-
-    return packed_list
-
-
-def unpack_prefix_and_x(packed: int) :
-    """
-    Dépacke un entier en (prefix_int, x)
-    """
-    x = packed & ((1 << 64) - 1)
-    prefix_int = packed >> 64
-    return prefix_int, x
-
-
-def split_list(data: List[int], parts: int) -> List[List[int]]:
-    """
-    Découpe une liste en `parts` sous-listes de taille aussi égale que possible
-    """
-    n = len(data)
-    if parts <= 1 or n == 0:
-        return [data]
-
-    chunk_size = n // parts
-    remainder = n % parts
-
-    result: List[List[int]] = []
-    start = 0
-    for i in range(parts):
-        size = chunk_size + (1 if i < remainder else 0)
-        end = start + size
-        result.append(data[start:end])
-        start = end
-
-    return result
-
-
-def sort_chunk(chunk: List[int]) -> List[int]:
-    """
-    Trie une sous-liste qui sera exécuté dans un process séparé
-    """
-    chunk.sort()
-    return chunk
-
-
-def merge_sorted_lists(sorted_lists) :
-    """
-    Fusionne plusieurs listes déjà triées en un seul flux trié.
-    """
-    return heapq.merge(*sorted_lists)
-
-def init_worker():
-    signal.signal(signal.SIGINT, signal.SIG_IGN)
-
-def main():
-    """
-    Point d'entrée principal du programme
-    """
-    parser = argparse.ArgumentParser(description="Collision sur préfixe par table unique + tri parallèle")
-    parser.add_argument("--target-prefix","-t",type=int,default=DEFAULT_PREFIX,help="Nombre de caractères hexadécimaux du préfixe (par défaut {})".format(DEFAULT_PREFIX),)
-    parser.add_argument("--algo","-a",type=str,default=DEFAULT_ALGO,choices=["sha256", "sha3_256"],help="Algorithme de hachage à utiliser sha256 ou sha3_256",)
-    parser.add_argument("--max-samples","-n",type=int,default=DEFAULT_MAX_SAMPLES,help="Nombre total d'échantillons à générer",)
-    parser.add_argument("--workers","-w",type=int,default=DEFAULT_WORKERS,help="Nombre de processus pour la génération",)
-    parser.add_argument("--sort-chunks","-s",type=int,default=DEFAULT_SORT_CHUNKS,help="Nombre de morceaux pour le tri parallèle",)
-
-    args = parser.parse_args()
-
-    prefix_len_hex = args.target_prefix
-    algo = args.algo
-    max_samples = args.max_samples
-    workers = args.workers
-    sort_chunks = args.sort_chunks
-
-    ensure_dir(BASE_DIR)
-
-    print("Algorithme           :", algo)
-    print("Préfixe cible        :", prefix_len_hex, "hex")
-    print("Échantillons demandés:", max_samples)
-    print("Workers génération   :", workers)
-    print("Morceaux de tri      :", sort_chunks)
-
-    # Répartition des échantillons entre les workers
-    base_count = max_samples // workers
-    remainder = max_samples % workers
-
-    counts: List[int] = []
-    for index in range(workers):
-        worker_count = base_count
-        if index < remainder:
-            worker_count += 1
-        if worker_count > 0:
-            counts.append(worker_count)
-
-    start_time = time.time()
-
-    print("Génération en cours...")
-    packed_all: List[int] = []
-    
-    gen_pool = mp.Pool(processes=len(counts), initializer=init_worker)
-    try:
-        async_jobs = []
-        for index, count in enumerate(counts):
-            seed = (int(time.time()) ^ (os.getpid() << 16) ^ (index << 8)) & 0xFFFFFFFF
-            async_jobs.append(
-                gen_pool.apply_async(worker_generate_packed, (count, prefix_len_hex, algo, seed))
-            )
-
-        for job in async_jobs:
-            part = job.get()
-            packed_all.extend(part)
-
-    except KeyboardInterrupt:
-        print("\n[MAIN] Ctrl+C pendant la génération -> arrêt immédiat des workers.")
-        gen_pool.terminate()
-        gen_pool.join()
-        return
-    else:
-        gen_pool.close()
-        gen_pool.join()
-    
-    gen_time = time.time()
-    print("  Génération terminée en {:.2f} secondes ({} entrées).".format(gen_time - start_time,len(packed_all)))
-
-    print("Tri parallèle en cours...")
-
-    sublists = split_list(packed_all, sort_chunks)
-    # on n'a plus besoin de la grosse référence
-    packed_all = None
-
-    # limite le nombre de process de tri
-    sort_procs = min(len(sublists), os.cpu_count() or 1)
-    sort_pool = mp.Pool(processes=sort_procs, initializer=init_worker)
-
-    sorted_sublists: List[List[int]] = []
-    try:
-        async_sort_jobs = []
-        for sub in sublists:
-            async_sort_jobs.append(sort_pool.apply_async(sort_chunk, (sub,)))
-
-        for job in async_sort_jobs:
-            sorted_part = job.get()
-            sorted_sublists.append(sorted_part)
-
-    except KeyboardInterrupt:
-        print("\n[MAIN] Ctrl+C pendant le tri -> arrêt immédiat des workers de tri.")
-        sort_pool.terminate()
-        sort_pool.join()
-        return
-    else:
-        sort_pool.close()
-        sort_pool.join()
-    
-    sort_time = time.time()
-    print("  Tri terminé en {:.2f} secondes.".format(sort_time - gen_time))
-
-    print("Fusion des morceaux triés et recherche de doublons...")
-
-    merged_iter = merge_sorted_lists(sorted_sublists)
-    hash_function = make_hash_func(algo)
-    previous_packed = None
-    collision = None
-
-    try:
-        for packed in merged_iter:
-            if previous_packed is not None:
-                prev_prefix, prev_x = unpack_prefix_and_x(previous_packed)
-                cur_prefix, cur_x = unpack_prefix_and_x(packed)
-
-                if prev_prefix == cur_prefix and prev_x != cur_x:
-                    # re-vérification
-                    hash1 = hash_function(prev_x.to_bytes(8, "big")).hex()
-                    hash2 = hash_function(cur_x.to_bytes(8, "big")).hex()
-                    if hash1[:prefix_len_hex] == hash2[:prefix_len_hex]:
-                        collision = (prev_prefix, prev_x, cur_x, hash1, hash2)
-                        break
-
-            previous_packed = packed
-    except KeyboardInterrupt:
-        print("\n[MAIN] Ctrl+C pendant la fusion/recherche -> arrêt.")
-        return
-
-    end_time = time.time()
-
-    if collision is not None:
-        prefix_int, x1, x2, hash1, hash2 = collision
-        print("=== COLLISION TROUVÉE ===")
-        print("Préfixe (int)   :", prefix_int)
-        print("x1              :", "{:016x}".format(x1))
-        print("x2              :", "{:016x}".format(x2))
-        print("hash1           :", hash1)
-        print("hash2           :", hash2)
-
-        run_root = os.path.join(BASE_DIR, "pref_{:02d}".format(prefix_len_hex))
-        ensure_dir(run_root)
-
-        file1 = os.path.join(run_root,"{}_p{:02d}_x1_{:016x}.bin".format(algo, prefix_len_hex, x1))
-        file2 = os.path.join(run_root,"{}_p{:02d}_x2_{:016x}.bin".format(algo, prefix_len_hex, x2))
-
-        with open(file1, "wb") as f1:
-            f1.write(x1.to_bytes(8, "big"))
-
-        with open(file2, "wb") as f2:
-            f2.write(x2.to_bytes(8, "big"))
-
-        print("Fichiers écrits dans :", run_root)
-    else:
-        print("Aucune collision trouvée dans ces échantillons")
-        print("Augmentez --max-samples ou réduisez --target-prefix")
-
-    print("Temps total :", "{:.2f} secondes".format(end_time - start_time))
-
-
-if __name__ == "__main__":
-    mp.freeze_support()
-    main()
+import argparse
+import ctypes
+import hashlib
+import os
+import time
+import multiprocessing as mp
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Tuple
+
+import numpy as np
+
+
+# Dossier où seront écrits les résultats
+BASE_DIR = "Collision_Birthday"
+
+# Valeurs par défaut
+DEFAULT_ALGO = "sha256"
+DEFAULT_PREFIX = 10
+DEFAULT_MAX_SAMPLES = 7_000_000  # à adapter selon la RAM disponible
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+# Taille des tuiles du scan de collision : 256K uint64 = 2 Mo, calibré pour
+# tenir dans le cache L2 pendant la comparaison des voisins
+SCAN_TILE = 262_144
+
+# Au-delà de ce nombre d'échantillons, les tableaux sont automatiquement
+# adossés à des fichiers temporaires (np.memmap) plutôt qu'à la mémoire
+# partagée : le noyau pagine vers le disque au lieu de laisser l'OOM killer
+# tuer le process quand le jeu de données dépasse la RAM
+MEMMAP_THRESHOLD = 50_000_000
+
+# Nombre maximum de paires candidates remontées par la fusion k-voies native.
+# Bien au-delà de la borne anniversaire attendue ; et comme toute paire
+# candidate est déjà une collision de préfixe, une troncature serait sans
+# conséquence
+KWAY_CAND_MAX = 4096
+
+# Bibliothèque native optionnelle (voir ckernels.c et Makefile)
+CKERNELS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "libckernels.so")
+
+_ckernels = None
+_ckernels_loaded = False
+
+
+def load_ckernels():
+    """
+    Charge la bibliothèque native si elle a été compilée (make), sinon renvoie
+    None et le script reste en pur Python. Le résultat est mis en cache :
+    chaque process ne tente le chargement qu'une seule fois
+    """
+    global _ckernels, _ckernels_loaded
+    if _ckernels_loaded:
+        return _ckernels
+    _ckernels_loaded = True
+
+    try:
+        lib = ctypes.CDLL(CKERNELS_PATH)
+    except OSError:
+        return None
+
+    lib.ckernels_has_shani.argtypes = []
+    lib.ckernels_has_shani.restype = ctypes.c_int
+    lib.sha256ni_batch_prefix.argtypes = [
+        ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int, ctypes.c_void_p,
+    ]
+    lib.sha256ni_batch_prefix.restype = None
+    lib.ckernels_has_sha256_batch.argtypes = []
+    lib.ckernels_has_sha256_batch.restype = ctypes.c_int
+    lib.sha256_batch_prefix.argtypes = [
+        ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int, ctypes.c_void_p,
+    ]
+    lib.sha256_batch_prefix.restype = None
+    lib.radix_sort_u64_by_key.argtypes = [
+        ctypes.c_void_p, ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int,
+    ]
+    lib.radix_sort_u64_by_key.restype = ctypes.c_int
+    lib.kway_merge_find_candidates.argtypes = [
+        ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p,
+        ctypes.c_size_t, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_size_t,
+    ]
+    lib.kway_merge_find_candidates.restype = ctypes.c_size_t
+    lib.hashtable_find_candidates.argtypes = [
+        ctypes.c_void_p, ctypes.c_void_p, ctypes.c_size_t,
+        ctypes.c_void_p, ctypes.c_void_p, ctypes.c_size_t,
+    ]
+    lib.hashtable_find_candidates.restype = ctypes.c_size_t
+
+    _ckernels = lib
+    return lib
+
+
+def ensure_dir(path: str) -> None:
+    """
+    Crée le dossier s'il n'existe pas
+    """
+    os.makedirs(path, exist_ok=True)
+
+
+def make_hash_template(algo: str):
+    """
+    Retourne un objet de hachage "modèle" (contexte vierge) pour l'algorithme
+    demandé. On le clone ensuite avec .copy() pour chaque message : le contexte
+    initialisé une seule fois est dupliqué au lieu d'être reconstruit, ce qui
+    évite de payer l'initialisation OpenSSL à chaque hash
+    """
+    if algo == "sha256":
+        return hashlib.sha256()
+    elif algo == "sha3_256":
+        return hashlib.sha3_256()
+    else:
+        raise ValueError("Algorithme de hachage inconnu : {}".format(algo))
+
+
+def make_hash_func(algo: str):
+    """
+    Retourne une fonction de hachage correspondant au nom d'algorithme demandé.
+    La fonction retournée prend des bytes en entrée et renvoie le digest (bytes)
+    """
+    template = make_hash_template(algo)
+
+    def hash_function(data: bytes) -> bytes:
+        h = template.copy()
+        h.update(data)
+        return h.digest()
+
+    return hash_function
+
+
+def splitmix64(z: np.ndarray) -> np.ndarray:
+    """
+    PRNG SplitMix64 en mode compteur, vectorisé : prend un tableau uint64 de
+    compteurs et renvoie un tableau uint64 pseudo-aléatoire. C'est une
+    bijection sur 64 bits (3 multiplications + 3 xor), donc deux compteurs
+    distincts donnent toujours deux valeurs distinctes
+    """
+    z = z.copy()
+    z ^= z >> np.uint64(30)
+    z *= np.uint64(0xBF58476D1CE4E5B9)
+    z ^= z >> np.uint64(27)
+    z *= np.uint64(0x94D049BB133111EB)
+    z ^= z >> np.uint64(31)
+    return z
+
+
+def worker_generate(prefix_store: str,x_store: str,use_memmap: bool,offset: int,count: int,prefix_len_hex: int,algo: str,base_counter: int,sort_slice: bool = True) -> None:
+    """
+    Fonction exécutée dans un processus worker
+
+    Elle génère `count` valeurs x en appliquant SplitMix64 aux compteurs
+    [base_counter + offset, base_counter + offset + count), calcule leurs
+    hash et extrait le préfixe demandé.
+
+    Les résultats sont écrits directement dans la tranche
+    [offset, offset + count) de deux buffers partagés (préfixes et x) :
+    segments de mémoire partagée, ou fichiers mappés en mémoire pour les
+    très gros runs. Rien n'est renvoyé au process principal, donc aucun
+    pickle de tableaux entre processus
+    """
+    shm_prefix = None
+    shm_x = None
+    prefix_out = None
+    x_out = None
+    try:
+        if use_memmap:
+            # prefix_store / x_store sont des chemins de fichiers pré-taillés :
+            # le noyau pagine les tranches à la demande
+            prefix_out = np.memmap(prefix_store, dtype=np.uint64, mode="r+", offset=offset * 8, shape=(count,))
+            x_out = np.memmap(x_store, dtype=np.uint64, mode="r+", offset=offset * 8, shape=(count,))
+        else:
+            shm_prefix = shared_memory.SharedMemory(name=prefix_store)
+            shm_x = shared_memory.SharedMemory(name=x_store)
+            prefix_out = np.ndarray((count,), dtype=np.uint64, buffer=shm_prefix.buf, offset=offset * 8)
+            x_out = np.ndarray((count,), dtype=np.uint64, buffer=shm_x.buf, offset=offset * 8)
+
+        prefix_bits = prefix_len_hex * 4
+
+        # Tire toute la randomness d'un coup via SplitMix64 en mode compteur :
+        # pas d'état de générateur à faire avancer, juste un arange vectorisé.
+        # Les workers partagent le même compteur de base et se distinguent par
+        # leur offset : l'espace de compteurs du run est contigu, et comme
+        # SplitMix64 est une bijection sur 64 bits, aucun x n'est généré deux
+        # fois dans un même run
+        start = (base_counter + offset) & 0xFFFFFFFFFFFFFFFF
+        counters = np.uint64(start) + np.arange(count, dtype=np.uint64)
+        x_out[:] = splitmix64(counters)
+
+        # Chemins rapides (sha256 uniquement) : noyau SHA-NI si le CPU le
+        # supporte, sinon boucle C sur le SHA-256 d'OpenSSL avec contexte
+        # recopié par message. Les deux consomment la tranche partagée
+        # directement et y écrivent les préfixes en une passe C
+        lib = load_ckernels()
+        if algo == "sha256" and lib is not None and lib.ckernels_has_shani():
+            lib.sha256ni_batch_prefix(
+                ctypes.c_void_p(x_out.ctypes.data),
+                count,
+                64 - prefix_bits,
+                ctypes.c_void_p(prefix_out.ctypes.data),
+            )
+        elif algo == "sha256" and lib is not None and lib.ckernels_has_sha256_batch():
+            lib.sha256_batch_prefix(
+                ctypes.c_void_p(x_out.ctypes.data),
+                count,
+                64 - prefix_bits,
+                ctypes.c_void_p(prefix_out.ctypes.data),
+            )
+        else:
+            # Contexte modèle initialisé une fois, cloné par message
+            # (fork-and-finalize), la méthode .copy() liée à une locale
+            _copy_ctx = make_hash_template(algo).copy
+
+            # Le dtype big-endian ('>u8') fait que tobytes() donne directement
+            # chaque x en gros-boutiste, prêt à être haché
+            buf = x_out.astype(">u8").tobytes()
+
+            # La boucle chaude ne fait plus que hacher : les 8 premiers octets
+            # de chaque digest sont accumulés dans un buffer contigu, et la
+            # conversion octets -> préfixe se fait en un passage vectorisé
+            digests = bytearray(count * 8)
+
+            for i in range(count):
+                # Hacher le message de 64 bits (8 octets consécutifs du buffer)
+                h = _copy_ctx()
+                h.update(buf[i * 8:(i + 1) * 8])
+                digests[i * 8:(i + 1) * 8] = h.digest()[:8]
+
+            # Décodage vectorisé : chaque bloc de 8 octets est lu en
+            # gros-boutiste, puis décalé pour garder les bits de poids fort.
+            # Cas spécialisé prefix_bits == 64 : le préfixe occupe tout le
+            # mot, le passage de décalage est inutile
+            decoded = np.frombuffer(digests, dtype=">u8").astype(np.uint64)
+            if prefix_bits < 64:
+                decoded >>= np.uint64(64 - prefix_bits)
+            prefix_out[:] = decoded
+
+        # Tri local de la tranche, pendant que les autres workers hachent
+        # encore la leur : la phase de tri recouvre ainsi la génération, et
+        # le process principal n'a plus qu'à fusionner des tranches triées.
+        # (inutile avec le détecteur par table de hachage, qui se passe de
+        # tout ordre : sort_slice est alors False)
+        if not sort_slice:
+            pass
+        elif lib is not None:
+            lib.radix_sort_u64_by_key(
+                ctypes.c_void_p(prefix_out.ctypes.data),
+                ctypes.c_void_p(x_out.ctypes.data),
+                count,
+                (prefix_bits + 7) // 8,
+            )
+        else:
+            order = np.argsort(prefix_out, kind="stable")
+            prefix_out[:] = prefix_out[order]
+            x_out[:] = x_out[order]
+    finally:
+        # Relâche les vues numpy avant close(), sinon le buffer est encore
+        # exporté et la fermeture échoue
+        prefix_out = None
+        x_out = None
+        if shm_prefix is not None:
+            shm_prefix.close()
+        if shm_x is not None:
+            shm_x.close()
+
+
+# Paramètres du run communs à tous les workers, renseignés par le process
+# principal juste avant de créer le pool. Avec la méthode de démarrage fork,
+# les workers héritent de cette variable telle quelle : seul l'indice du
+# worker transite encore par pickle
+_RUN_PARAMS = None
+
+
+def worker_generate_forked(index: int) -> None:
+    """
+    Point d'entrée des workers quand le pool est démarré par fork() : les
+    paramètres du run sont lus dans le global hérité du parent au lieu
+    d'être picklés dans le tuple d'arguments de chaque tâche
+    """
+    (prefix_store, x_store, use_memmap, offsets, counts,
+     prefix_len_hex, algo, base_counter, sort_slice) = _RUN_PARAMS
+    worker_generate(prefix_store, x_store, use_memmap, offsets[index],
+                    counts[index], prefix_len_hex, algo, base_counter,
+                    sort_slice)
+
+
+def merge_two_runs(run_a: Tuple[np.ndarray, np.ndarray],run_b: Tuple[np.ndarray, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fusionne deux paires (préfixes, x) déjà triées par préfixe en une seule,
+    entièrement en numpy : searchsorted donne la position d'insertion de
+    chaque élément de B dans A, le placement se fait par indexation
+    vectorisée, sans boucle Python
+    """
+    prefix_a, x_a = run_a
+    prefix_b, x_b = run_b
+
+    n = len(prefix_a) + len(prefix_b)
+    merged_prefix = np.empty(n, dtype=np.uint64)
+    merged_x = np.empty(n, dtype=np.uint64)
+
+    pos_b = np.searchsorted(prefix_a, prefix_b, side="right")
+    pos_b = pos_b + np.arange(len(prefix_b))
+
+    mask_a = np.ones(n, dtype=bool)
+    mask_a[pos_b] = False
+
+    merged_prefix[pos_b] = prefix_b
+    merged_x[pos_b] = x_b
+    merged_prefix[mask_a] = prefix_a
+    merged_x[mask_a] = x_a
+
+    return merged_prefix, merged_x
+
+
+def merge_sorted_runs(runs: List[Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fusionne k paires triées en tournoi (fusions deux à deux) : log2(k)
+    passes vectorisées sur les données
+    """
+    while len(runs) > 1:
+        merged: List[Tuple[np.ndarray, np.ndarray]] = []
+        for i in range(0, len(runs) - 1, 2):
+            merged.append(merge_two_runs(runs[i], runs[i + 1]))
+        if len(runs) % 2:
+            merged.append(runs[-1])
+        runs = merged
+    return runs[0]
+
+
+def init_worker():
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def main():
+    """
+    Point d'entrée principal du programme
+    """
+    parser = argparse.ArgumentParser(description="Collision sur préfixe par table unique + tri parallèle")
+    parser.add_argument("--target-prefix","-t",type=int,default=DEFAULT_PREFIX,help="Nombre de caractères hexadécimaux du préfixe (par défaut {})".format(DEFAULT_PREFIX),)
+    parser.add_argument("--algo","-a",type=str,default=DEFAULT_ALGO,choices=["sha256", "sha3_256"],help="Algorithme de hachage à utiliser sha256 ou sha3_256",)
+    parser.add_argument("--max-samples","-n",type=int,default=DEFAULT_MAX_SAMPLES,help="Nombre total d'échantillons à générer",)
+    parser.add_argument("--workers","-w",type=int,default=DEFAULT_WORKERS,help="Nombre de processus pour la génération",)
+    parser.add_argument("--memmap",action="store_true",help="Adosse les tableaux à des fichiers temporaires (automatique au-delà de {} échantillons)".format(MEMMAP_THRESHOLD),)
+    parser.add_argument("--detector",type=str,default="sort",choices=["sort", "hashtable"],help="Méthode de détection des doublons : tri + fusion (par défaut) ou table de hachage native sans tri",)
+
+    args = parser.parse_args()
+
+    # Toute la chaîne (génération, tri, scan) travaille sur des uint64 : un
+    # préfixe est limité à 16 caractères hex (64 bits). Au-delà, le stockage
+    # déborderait silencieusement — et 2^32 échantillons ne suffiraient de
+    # toute façon jamais à trouver une collision sur plus de 64 bits
+    if not 1 <= args.target_prefix <= 16:
+        parser.error("--target-prefix doit être entre 1 et 16 caractères hexadécimaux")
+
+    prefix_len_hex = args.target_prefix
+    algo = args.algo
+    max_samples = args.max_samples
+    workers = args.workers
+
+    # Le détecteur par table de hachage n'existe qu'en natif : sans la
+    # bibliothèque compilée, on se replie d'entrée sur le tri
+    detector = args.detector
+    if detector == "hashtable" and load_ckernels() is None:
+        print("Noyaux natifs absents : --detector hashtable indisponible, repli sur le tri")
+        detector = "sort"
+
+    ensure_dir(BASE_DIR)
+
+    print("Algorithme           :", algo)
+    print("Préfixe cible        :", prefix_len_hex, "hex")
+    print("Échantillons demandés:", max_samples)
+    print("Workers génération   :", workers)
+    print("Détecteur            :", detector)
+
+    # Répartition des échantillons entre les workers
+    base_count = max_samples // workers
+    remainder = max_samples % workers
+
+    counts: List[int] = []
+    for index in range(workers):
+        worker_count = base_count
+        if index < remainder:
+            worker_count += 1
+        if worker_count > 0:
+            counts.append(worker_count)
+
+    start_time = time.time()
+
+    total = sum(counts)
+
+    # Deux buffers partagés dimensionnés pour tout le jeu de données : chaque
+    # worker écrit directement dans sa tranche disjointe, le process principal
+    # ne dépickle plus aucun résultat (zéro copie). En mémoire partagée par
+    # défaut ; pour les très gros runs, des fichiers temporaires mappés en
+    # mémoire, que le noyau pagine vers le disque si la RAM ne suffit pas
+    use_memmap = args.memmap or max_samples >= MEMMAP_THRESHOLD
+    prefix_shm = None
+    x_shm = None
+
+    if use_memmap:
+        print("Stockage             : fichiers mappés en mémoire")
+        prefix_store = os.path.join(BASE_DIR, "prefix_{}.tmp".format(os.getpid()))
+        x_store = os.path.join(BASE_DIR, "x_{}.tmp".format(os.getpid()))
+        for path in (prefix_store, x_store):
+            with open(path, "wb") as f:
+                f.truncate(max(8 * total, 8))
+    else:
+        prefix_shm = shared_memory.SharedMemory(create=True, size=max(8 * total, 8))
+        x_shm = shared_memory.SharedMemory(create=True, size=max(8 * total, 8))
+        prefix_store = prefix_shm.name
+        x_store = x_shm.name
+
+    prefix_all = None
+    x_all = None
+
+    try:
+        print("Génération en cours...")
+
+        # Un seul point de départ aléatoire pour tout le run : chaque
+        # worker dérive sa plage de compteurs de son offset, plus besoin
+        # de fabriquer une seed par worker à base de time/pid
+        base_counter = int.from_bytes(os.urandom(8), "big")
+
+        offsets: List[int] = []
+        offset = 0
+        for count in counts:
+            offsets.append(offset)
+            offset += count
+
+        # Sur Linux/macOS, les workers sont démarrés par fork() et héritent
+        # des paramètres du run via le global _RUN_PARAMS : chaque tâche ne
+        # pickle plus qu'un indice. Là où fork n'existe pas (Windows), les
+        # paramètres complets sont picklés dans chaque tuple d'arguments
+        use_fork = "fork" in mp.get_all_start_methods()
+
+        sort_slice = detector == "sort"
+
+        if use_fork:
+            global _RUN_PARAMS
+            _RUN_PARAMS = (prefix_store, x_store, use_memmap, offsets, counts,
+                           prefix_len_hex, algo, base_counter, sort_slice)
+            executor = ProcessPoolExecutor(
+                max_workers=len(counts),
+                mp_context=mp.get_context("fork"),
+                initializer=init_worker,
+            )
+        else:
+            executor = ProcessPoolExecutor(max_workers=len(counts), initializer=init_worker)
+
+        try:
+            futures = []
+            for index in range(len(counts)):
+                if use_fork:
+                    futures.append(executor.submit(worker_generate_forked, index))
+                else:
+                    futures.append(
+                        executor.submit(
+                            worker_generate,
+                            prefix_store, x_store, use_memmap, offsets[index],
+                            counts[index], prefix_len_hex, algo, base_counter,
+                            sort_slice,
+                        )
+                    )
+
+            for future in futures:
+                future.result()
+
+        except KeyboardInterrupt:
+            print("\n[MAIN] Ctrl+C pendant la génération -> arrêt immédiat des workers.")
+            executor.shutdown(wait=False, cancel_futures=True)
+            return
+        else:
+            executor.shutdown()
+
+        # Vues numpy sur les buffers partagés : aucune copie, aucune concaténation
+        if use_memmap:
+            prefix_all = np.memmap(prefix_store, dtype=np.uint64, mode="r+", shape=(total,))
+            x_all = np.memmap(x_store, dtype=np.uint64, mode="r+", shape=(total,))
+        else:
+            prefix_all = np.ndarray((total,), dtype=np.uint64, buffer=prefix_shm.buf)
+            x_all = np.ndarray((total,), dtype=np.uint64, buffer=x_shm.buf)
+
+        gen_time = time.time()
+        print("  Génération terminée en {:.2f} secondes ({} entrées).".format(gen_time - start_time,len(prefix_all)))
+
+        if detector == "hashtable":
+            print("Recherche de doublons par table de hachage...")
+        else:
+            print("Fusion des tranches triées et recherche de doublons...")
+
+        collision = None
+        lib = load_ckernels()
+
+        try:
+            candidates: List[Tuple[int, int]] = []
+            run_counts = counts
+
+            if detector == "hashtable" and total > 0:
+                # Table de hachage à adressage ouvert en C : une passe O(n)
+                # attendue sur les données, sans aucun tri (voir ckernels.c)
+                out_x1 = np.empty(KWAY_CAND_MAX, dtype=np.uint64)
+                out_x2 = np.empty(KWAY_CAND_MAX, dtype=np.uint64)
+
+                n_cand = lib.hashtable_find_candidates(
+                    ctypes.c_void_p(prefix_all.ctypes.data),
+                    ctypes.c_void_p(x_all.ctypes.data),
+                    total,
+                    ctypes.c_void_p(out_x1.ctypes.data),
+                    ctypes.c_void_p(out_x2.ctypes.data),
+                    KWAY_CAND_MAX,
+                )
+                if n_cand != ctypes.c_size_t(-1).value:
+                    for idx in range(n_cand):
+                        candidates.append((int(out_x1[idx]), int(out_x2[idx])))
+                else:
+                    # Allocation de la table échouée : tri complet en numpy
+                    # (les tranches n'ont pas été triées par les workers)
+                    # puis scan des voisins comme avec le détecteur par tri
+                    print("  Allocation de la table échouée, repli sur le tri")
+                    order = np.argsort(prefix_all, kind="stable")
+                    prefix_all = prefix_all[order]
+                    x_all = x_all[order]
+                    order = None
+                    run_counts = [total]
+                    detector = "sort"
+                    lib = None
+
+            if detector == "sort" and lib is not None and total > 0:
+                # Fusion k-voies native : un tas min parcourt les k tranches
+                # triées en une seule passe et émet directement les paires de
+                # préfixes adjacents égaux. Le tableau fusionné n'est jamais
+                # matérialisé, et le scan séparé disparaît (kernel fusion)
+                run_offsets = np.zeros(len(counts), dtype=np.uintp)
+                np.cumsum(counts[:-1], out=run_offsets[1:])
+                run_lengths = np.array(counts, dtype=np.uintp)
+                out_x1 = np.empty(KWAY_CAND_MAX, dtype=np.uint64)
+                out_x2 = np.empty(KWAY_CAND_MAX, dtype=np.uint64)
+
+                n_cand = lib.kway_merge_find_candidates(
+                    ctypes.c_void_p(prefix_all.ctypes.data),
+                    ctypes.c_void_p(x_all.ctypes.data),
+                    ctypes.c_void_p(run_offsets.ctypes.data),
+                    ctypes.c_void_p(run_lengths.ctypes.data),
+                    len(counts),
+                    ctypes.c_void_p(out_x1.ctypes.data),
+                    ctypes.c_void_p(out_x2.ctypes.data),
+                    KWAY_CAND_MAX,
+                )
+                if n_cand != ctypes.c_size_t(-1).value:
+                    for idx in range(n_cand):
+                        candidates.append((int(out_x1[idx]), int(out_x2[idx])))
+                else:
+                    lib = None  # allocation échouée : repli numpy
+
+            if detector == "sort" and lib is None and total > 0:
+                # Repli sans noyau natif : fusion des tranches en log2(k)
+                # passes numpy vectorisées, puis scan des voisins par tuiles
+                # dimensionnées pour le cache L2 (SCAN_TILE uint64 = 2 Mo),
+                # chaque tuile restant résidente pendant sa comparaison
+                if len(run_counts) > 1:
+                    runs: List[Tuple[np.ndarray, np.ndarray]] = []
+                    run_offset = 0
+                    for count in run_counts:
+                        runs.append((
+                            prefix_all[run_offset:run_offset + count],
+                            x_all[run_offset:run_offset + count],
+                        ))
+                        run_offset += count
+
+                    prefix_all, x_all = merge_sorted_runs(runs)
+                    runs = None
+
+                n = len(prefix_all)
+                for tile_start in range(0, max(n - 1, 0), SCAN_TILE):
+                    tile_stop = min(tile_start + SCAN_TILE + 1, n)
+                    tile = prefix_all[tile_start:tile_stop]
+
+                    eq = tile[1:] == tile[:-1]
+                    for j in np.flatnonzero(eq):
+                        i = tile_start + int(j)
+                        candidates.append((int(x_all[i]), int(x_all[i + 1])))
+
+            # Une paire candidate est déjà une collision vérifiée : les
+            # préfixes stockés sont les bits exacts du digest, donc leur
+            # égalité dans la fusion EST la comparaison des digests tronqués.
+            # Le re-hachage ne sert qu'à produire les digests complets pour
+            # l'affichage (2 appels, une seule fois, hors boucle chaude).
+            # (pas besoin de vérifier x1 != x2 : SplitMix64 étant bijectif
+            # sur des compteurs tous distincts, aucun x n'apparaît deux fois)
+            if candidates:
+                hash_function = make_hash_func(algo)
+                x1, x2 = candidates[0]
+                hash1 = hash_function(x1.to_bytes(8, "big")).hex()
+                hash2 = hash_function(x2.to_bytes(8, "big")).hex()
+                prefix_int = int(hash1[:prefix_len_hex], 16)
+                collision = (prefix_int, x1, x2, hash1, hash2)
+        except KeyboardInterrupt:
+            print("\n[MAIN] Ctrl+C pendant la recherche -> arrêt.")
+            return
+
+        end_time = time.time()
+
+        if collision is not None:
+            prefix_int, x1, x2, hash1, hash2 = collision
+            print("=== COLLISION TROUVÉE ===")
+            print("Préfixe (int)   :", prefix_int)
+            print("x1              :", "{:016x}".format(x1))
+            print("x2              :", "{:016x}".format(x2))
+            print("hash1           :", hash1)
+            print("hash2           :", hash2)
+
+            run_root = os.path.join(BASE_DIR, "pref_{:02d}".format(prefix_len_hex))
+            ensure_dir(run_root)
+
+            file1 = os.path.join(run_root,"{}_p{:02d}_x1_{:016x}.bin".format(algo, prefix_len_hex, x1))
+            file2 = os.path.join(run_root,"{}_p{:02d}_x2_{:016x}.bin".format(algo, prefix_len_hex, x2))
+
+            with open(file1, "wb") as f1:
+                f1.write(x1.to_bytes(8, "big"))
+
+            with open(file2, "wb") as f2:
+                f2.write(x2.to_bytes(8, "big"))
+
+            print("Fichiers écrits dans :", run_root)
+        else:
+            print("Aucune collision trouvée dans ces échantillons")
+            print("Augmentez --max-samples ou réduisez --target-prefix")
+
+        print("Temps total :", "{:.2f} secondes".format(end_time - start_time))
+    finally:
+        # Relâche les vues numpy avant de fermer puis détruire les buffers
+        prefix_all = None
+        x_all = None
+        if use_memmap:
+            for path in (prefix_store, x_store):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        else:
+            prefix_shm.close()
+            prefix_shm.unlink()
+            x_shm.close()
+            x_shm.unlink()
+
+
+if __name__ == "__main__":
+    mp.freeze_support()
+    main()